@@ -7,12 +7,18 @@ User data is stored in SQLite (local) and PostreSQL (production).
 
 from fastapi import HTTPException, Security, Request, Depends
 from fastapi.security import APIKeyHeader
-from typing import Optional
-from pydantic import BaseModel
+from typing import NamedTuple, Optional
+from dataclasses import dataclass
 from enum import Enum
+import math
+from cachetools import TTLCache
 
+from app.core.config import get_settings
+from app.core.ratelimit import rate_limiter
 from app.services.user_db import user_db
 
+settings = get_settings()
+
 class UserTier(str, Enum):
     """
     Service tiers with different limits.
@@ -21,57 +27,151 @@ class UserTier(str, Enum):
     PRO = "pro"
     ENTERPRISE = "enterprise"
 
-class User(BaseModel):
+# Stored tier strings -> enum members, avoiding Enum.__call__ per lookup
+_TIER_BY_VALUE: dict[str, UserTier] = {t.value: t for t in UserTier}
+
+class TierLimits(NamedTuple):
+    """
+    Per-tier limits, built once at import time.
+    """
+    max_payload_bytes: int
+    max_ttl_seconds: int
+    max_stashes: int
+    rate_limit_per_minute: int
+    rate_limit_burst: int
+
+TIER_LIMITS: dict[UserTier, TierLimits] = {
+    UserTier.FREE: TierLimits(
+        max_payload_bytes=1_048_576,        # 1 MB
+        max_ttl_seconds=3600,               # 1 hour max
+        max_stashes=100,
+        rate_limit_per_minute=60,
+        rate_limit_burst=10,
+    ),
+    UserTier.PRO: TierLimits(
+        max_payload_bytes=52_428_800,       # 50 MB
+        max_ttl_seconds=86400,              # 24 hours max
+        max_stashes=1000,
+        rate_limit_per_minute=300,
+        rate_limit_burst=50,
+    ),
+    UserTier.ENTERPRISE: TierLimits(
+        max_payload_bytes=524_288_000,      # 500 MB
+        max_ttl_seconds=604800,             # 7 days max
+        max_stashes=10000,
+        rate_limit_per_minute=1000,
+        rate_limit_burst=200,
+    ),
+}
+
+@dataclass(slots=True, frozen=True)
+class User:
     """
     Authenticated user with tier information.
+
+    Built only from trusted database rows, so it is a plain dataclass
+    rather than a validated Pydantic model.
     """
     id: str
     tier: UserTier
 
+    @property
+    def limits(self) -> TierLimits:
+        """All limits for this tier."""
+        return TIER_LIMITS[self.tier]
+
     @property
     def max_payload_bytes(self) -> int:
         """Maximum payload size for this tier."""
-        limits = {
-            UserTier.FREE: 1_048_576,        # 1 MB
-            UserTier.PRO: 52_428_800,        # 50 MB
-            UserTier.ENTERPRISE: 524_288_000, # 500 MB
-        }
-        return limits[self.tier]
+        return TIER_LIMITS[self.tier].max_payload_bytes
     
     @property
     def max_ttl_seconds(self) -> int:
         """Maximum allowed TTL for this tier."""
-        limits = {
-            UserTier.FREE: 3600,        # 1 hour max
-            UserTier.PRO: 86400,        # 24 hours max
-            UserTier.ENTERPRISE: 604800, # 7 days max
-        }
-        return limits[self.tier]
+        return TIER_LIMITS[self.tier].max_ttl_seconds
     
     @property
     def max_stashes(self) -> int:
-        limits = {
-            UserTier.FREE: 100,
-            UserTier.PRO: 1000,
-            UserTier.ENTERPRISE: 10000,
-        }
-        return limits[self.tier]
+        return TIER_LIMITS[self.tier].max_stashes
     
     @property
     def rate_limit_per_minute(self) -> int:
-        limits = {
-            UserTier.FREE: 60,
-            UserTier.PRO: 300,
-            UserTier.ENTERPRISE: 1000,
-        }
-        return limits[self.tier]
+        return TIER_LIMITS[self.tier].rate_limit_per_minute
+
+    @property
+    def rate_limit_burst(self) -> int:
+        return TIER_LIMITS[self.tier].rate_limit_burst
+
+class RawAPIKeyHeader(APIKeyHeader):
+    """
+    APIKeyHeader that reads the raw ASGI header list.
+
+    Skips building Starlette's case-insensitive Headers object by matching
+    the pre-lowercased header name as bytes. Behaves like APIKeyHeader:
+    a missing or empty header counts as no key.
+    """
+
+    def __init__(self, *, name: str, auto_error: bool = True, **kwargs):
+        # Keep the OpenAPI security scheme name unchanged
+        kwargs.setdefault("scheme_name", "APIKeyHeader")
+        super().__init__(name=name, auto_error=auto_error, **kwargs)
+        self._raw_name = name.lower().encode("latin-1")
+
+    async def __call__(self, request: Request) -> Optional[str]:
+        for key, value in request.scope["headers"]:
+            if key == self._raw_name:
+                if value:
+                    return value.decode("latin-1")
+                break
+
+        if self.auto_error:
+            raise HTTPException(status_code=403, detail="Not authenticated")
+        return None
+
+# Authenticated users by API key hash, so repeat requests skip both the
+# database lookup and building the User. Keyed by hash rather than plaintext
+# so UserDB can evict a key it only knows by hash. Only valid keys are
+# cached; invalid keys always go to the database.
+_user_cache: TTLCache = TTLCache(
+    maxsize=settings.auth_cache_max_size,
+    ttl=settings.auth_cache_ttl_seconds,
+)
+
+def invalidate(key_hash: str) -> None:
+    """
+    Drop a cached user so the next request with this key re-reads the database.
+
+    Only affects this process; see auth_cache_ttl_seconds.
+    """
+    _user_cache.pop(key_hash, None)
+
+# Evict in this process as soon as a key is regenerated
+user_db.on_key_revoked(invalidate)
 
 # Define where to look for the API Key
-api_key_header = APIKeyHeader(
+api_key_header = RawAPIKeyHeader(
     name="X-API-KEY",
     auto_error=False, # We'll handle missing keys ourselves
 )
 
+async def _load_user(key_hash: str) -> User:
+    """Look up an API key hash in the database and cache the resulting User."""
+    user_data = await user_db.get_user_by_key_hash(key_hash)
+
+    if user_data is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid API key",
+            headers={"WWW-Authenticate": "ApiKey"},
+        )
+
+    user = User(
+        id=user_data["id"],
+        tier=_TIER_BY_VALUE[user_data["tier"]],
+    )
+    _user_cache[key_hash] = user
+    return user
+
 async def get_current_user(api_key: Optional[str] = Security(api_key_header),) -> User:
     """
     Dependency that extracts and validates the API key.
@@ -84,17 +184,21 @@ async def get_current_user(api_key: Optional[str] = Security(api_key_header),) -
             headers={"WWW-Authenticate": "ApiKey"},
         )
     
-    # Look up in database
-    user_data = await user_db.get_user_by_api_key(api_key)
+    key_hash = user_db.hash_key(api_key)
+    user = _user_cache.get(key_hash)
+    if user is None:
+        user = await _load_user(key_hash)
 
-    if user_data is None:
+    if settings.rate_limit_enabled and not rate_limiter.allow(
+        user.id, user.rate_limit_per_minute, user.rate_limit_burst
+    ):
         raise HTTPException(
-            status_code=401,
-            detail="Invalid API key",
-            headers={"WWW-Authenticate": "ApiKey"},
+            status_code=429,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(math.ceil(60 / user.rate_limit_per_minute))},
         )
-    
-    return User(
-        id=user_data["id"],
-        tier=UserTier(user_data["tier"]),
-    )
\ No newline at end of file
+
+    return user
+
+# Shared dependency marker so every route resolves the same Depends instance
+CurrentUser = Depends(get_current_user)
@@ -0,0 +1,32 @@
+"""
+Memory ID generation.
+
+IDs are 6 random bytes encoded as 8 URL-safe base64 characters, the same
+format as secrets.token_urlsafe(6). Random bytes are read from the OS in
+batches, so most requests take an ID from the pool without a syscall.
+"""
+
+import base64
+import os
+from collections import deque
+
+ID_BYTES = 6        # encodes to exactly 8 characters, no padding
+ID_CHARS = 8
+BATCH_SIZE = 512    # IDs per os.urandom() call (3 KB of randomness)
+
+_id_pool: deque[str] = deque()
+
+def _refill() -> None:
+    """Generate a batch of IDs from a single os.urandom() call."""
+    # Every 6 input bytes map to exactly 8 output characters,
+    # so the encoded batch can be sliced straight into IDs
+    encoded = base64.urlsafe_b64encode(os.urandom(ID_BYTES * BATCH_SIZE)).decode()
+    _id_pool.extend(
+        encoded[i:i + ID_CHARS] for i in range(0, len(encoded), ID_CHARS)
+    )
+
+def new_memory_id() -> str:
+    """Return a fresh random memory ID."""
+    if not _id_pool:
+        _refill()
+    return _id_pool.popleft()
@@ -2,6 +2,7 @@
 Structured logging configuration using structlog.
 """
 
+import orjson
 import structlog
 import logging
 import sys
@@ -9,7 +10,18 @@ from typing import Any
 
 from app.core.config import get_settings
 
-settings = get_settings()
+# Processors shared by every renderer, built once at import
+SHARED_PROCESSORS = [
+    structlog.stdlib.filter_by_level, # drop disabled levels before any work
+    structlog.contextvars.merge_contextvars,
+    structlog.processors.add_log_level,
+    structlog.processors.TimeStamper(fmt="iso"),
+    structlog.stdlib.PositionalArgumentsFormatter(),
+]
+
+def _orjson_dumps(value: Any, **kwargs: Any) -> str:
+    """Serialize a log event with orjson, returning str for stdlib handlers."""
+    return orjson.dumps(value, **kwargs).decode()
 
 def setup_logging() -> None:
     """
@@ -17,29 +29,20 @@ def setup_logging() -> None:
 
     Call this once at application startup.
     """
-    
-    # Configure structlog processors
-    shared_processors = [
-        structlog.contextvars.merge_contextvars,
-        structlog.processors.add_log_level,
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.stdlib.PositionalArgumentsFormatter(),
-        structlog.processors.StackInfoRenderer(),
-        structlog.processors.UnicodeDecoder(),
-    ]
+    settings = get_settings()
 
     if settings.log_format == "json":
         # JSON output for production
-        renderer = structlog.processors.JSONRenderer()
+        renderer = structlog.processors.JSONRenderer(serializer=_orjson_dumps)
     else:
         # Pretty console output for development
         renderer = structlog.dev.ConsoleRenderer(colors=True)
 
     structlog.configure(
-        processors=shared_processors + [renderer],
+        processors=SHARED_PROCESSORS + [renderer],
         wrapper_class=structlog.stdlib.BoundLogger,
         context_class=dict,
-        logger_factory=structlog.PrintLoggerFactory(),
+        logger_factory=structlog.stdlib.LoggerFactory(),
         cache_logger_on_first_use=True,
     )
 
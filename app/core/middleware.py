@@ -2,41 +2,58 @@
 Custom Middleware for request processing.
 """
 
-from fastapi import Request, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
-class PayloadSizeMiddleware(BaseHTTPMiddleware):
+class PayloadSizeMiddleware:
     """
     Middleware to validate request payload size.
 
     Checks content-length header before reading the body.
     This prevents memory exhaustion from oversized requests.
 
+    Written as a plain ASGI middleware rather than BaseHTTPMiddleware, so
+    requests that don't need checking pass straight through without the
+    extra task group and body stream.
+
     Note: We use a conservative default limit here. The actual tier-based limit is enforced in the route handler after authentication.
     """
 
     DEFAULT_LIMIT = 1_048_576  # 1 MB
+    CHECKED_METHODS = frozenset(("POST", "PUT", "PATCH"))
+
+    def __init__(self, app: ASGIApp, limit: int = DEFAULT_LIMIT):
+        self.app = app
+        self.limit = limit
 
-    async def dispatch(self, request, call_next):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """
         Check payload size before processing the request.
         """
-        if request.method in ("POST","PUT" ,"PATCH"):
-            content_length = request.headers.get("content-length")
-
-            if content_length:
-                size = int(content_length)
-
-                if size > self.DEFAULT_LIMIT:
-                    return JSONResponse(
+        if scope["type"] != "http" or scope["method"] not in self.CHECKED_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        # ASGI header names are already lowercased bytes
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    size = int(value)
+                except ValueError:
+                    break
+
+                if size > self.limit:
+                    response = JSONResponse(
                         status_code=413,
                         content={
                             "error": "Payload Too Large",
-                            "detail": f"Request body ({size} bytes) exceeds limit ({self.DEFAULT_LIMIT} bytes)",
-                            "limit_bytes": self.DEFAULT_LIMIT,
+                            "detail": f"Request body ({size} bytes) exceeds limit ({self.limit} bytes)",
+                            "limit_bytes": self.limit,
                         }
                     )
+                    await response(scope, receive, send)
+                    return
+                break
+
         # Continue to the route handler
-        response = await call_next(request)
-        return response
\ No newline at end of file
+        await self.app(scope, receive, send)
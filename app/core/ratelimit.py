@@ -0,0 +1,54 @@
+"""
+In-process rate limiting.
+
+A token bucket per user, kept in worker memory so the allow check costs a
+dict lookup rather than a network round-trip. Limits are per worker
+process; with N workers a user can reach up to N times the configured rate.
+"""
+
+import time
+
+from cachetools import LRUCache
+
+class TokenBucket:
+    """
+    Token bucket rate limiter keyed by user ID.
+
+    Each bucket holds up to `capacity` tokens (the burst size) and refills
+    at `rate_per_minute`. Buckets live in a bounded LRU so idle users are
+    evicted. Not thread-safe: intended for a single asyncio event loop,
+    where allow() runs without awaiting.
+    """
+
+    def __init__(self, maxsize: int = 10_000):
+        # user_id -> (tokens, last_refill)
+        self._buckets: LRUCache = LRUCache(maxsize=maxsize)
+
+    def allow(self, user_id: str, rate_per_minute: int, capacity: int) -> bool:
+        """
+        Take one token from the user's bucket.
+
+        Returns True if the request is allowed, False if the bucket is empty.
+        """
+        now = time.monotonic()
+        bucket = self._buckets.get(user_id)
+
+        if bucket is None:
+            tokens = float(capacity)
+        else:
+            tokens, last_refill = bucket
+            tokens = min(capacity, tokens + (now - last_refill) * rate_per_minute / 60)
+
+        if tokens < 1:
+            self._buckets[user_id] = (tokens, now)
+            return False
+
+        self._buckets[user_id] = (tokens - 1, now)
+        return True
+
+    def reset(self, user_id: str) -> None:
+        """Forget a user's bucket so they start with a full burst."""
+        self._buckets.pop(user_id, None)
+
+# Singleton instance
+rate_limiter = TokenBucket()
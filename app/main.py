@@ -4,11 +4,14 @@ Main application entry point
 """
 
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, Depends
-import secrets
-from datetime import datetime, timezone, timedelta
-from app.core.config import get_settings
-from app.core.auth import get_current_user, User
+from cachetools import TTLCache
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse
+import orjson
+import time
+from app.core.config import settings
+from app.core.auth import CurrentUser, User
+from app.core.ids import new_memory_id
 from app.core.logging import setup_logging, get_logger
 from app.models.schemas import (
     StashRequest,
@@ -21,14 +24,10 @@ from app.services.redis_service import redis_service
 from app.services.user_db import user_db
 from app.core.middleware import PayloadSizeMiddleware
 
+# Configure logging once at import, before any logger is used
+setup_logging()
 logger = get_logger(__name__)
 
-# Create the FastAPI application instance
-# This is the core object that handles all routing and middleware
-
-# Get settings instance
-settings = get_settings()
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -38,7 +37,6 @@ async def lifespan(app: FastAPI):
     Code after 'yield' runs at shutdown
     """
     # startup
-    setup_logging()
     logger.info("application starting", mode=settings.stash_mode)
     await user_db.connect()
     await redis_service.connect()
@@ -59,11 +57,14 @@ async def lifespan(app: FastAPI):
     await user_db.disconnect()
     await redis_service.disconnect()
 
+# Create the FastAPI application instance
+# This is the core object that handles all routing and middleware
 app = FastAPI(
     title="Stash",
     description="Working memory for AI developers and agents",
     version="0.2.0",
-     lifespan=lifespan,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Middleware
@@ -85,44 +86,62 @@ async def root():
         "mode": settings.stash_mode,
     }
 
+def _unstorable_data(exc: orjson.JSONEncodeError) -> HTTPException:
+    """
+    422 for data that passed validation but can't be stored.
+
+    Pydantic accepts JSON integers of any size, but stored records are
+    written with orjson, which only handles 64-bit integers.
+    """
+    return HTTPException(
+        status_code=422,
+        detail=f"Data can't be stored: {exc}",
+    )
+
 @app.post("/stash", response_model=StashResponse)
-async def stash(request: StashRequest, user: User = Depends(get_current_user)):
+async def stash(request: StashRequest, user: User = CurrentUser):
     """
     Store a JSON block with automatic expiration.
     The data will be deleted after the TTL expires.
-    Requires Auth -> user: User = Depends(get_current_user)
+    Requires Auth -> user: User = CurrentUser
     """
-    # Generate a simple ID (we'll improve this later)
-    memory_id = secrets.token_urlsafe(6) # ~8 characters
+    # Generate a short random ID from the pre-generated pool
+    memory_id = new_memory_id() # 8 characters
 
     # Enfore tier-based TTL limits
     ttl = min(request.ttl, user.max_ttl_seconds)
 
     # Store in Redis
-    await redis_service.stash(
-        user_id=user.id,
-        memory_id=memory_id,
-        data=request.data,
-        ttl_seconds=ttl
-    )
+    try:
+        await redis_service.stash(
+            user_id=user.id,
+            memory_id=memory_id,
+            data=request.data,
+            ttl_seconds=ttl
+        )
+    except orjson.JSONEncodeError as exc:
+        raise _unstorable_data(exc) from exc
 
-    # Calculate expiration time
-    expires_at = datetime.now(timezone.utc) + timedelta(seconds=request.ttl) 
+    # Calculate expiration time (unix epoch seconds)
+    expires_at = int(time.time()) + ttl
 
-    return StashResponse(
-        memory_id=memory_id,
-        ttl = ttl,
-        expires_at=expires_at,
-    )
+    # Return the response directly: the values are server-generated, so
+    # response_model is only used for the OpenAPI schema
+    return ORJSONResponse({
+        "memory_id": memory_id,
+        "ttl": ttl,
+        "expires_at": expires_at,
+    })
 
 @app.get("/recall/{memory_id}", response_model=RecallResponse)
-async def recall(memory_id: str, user: User = Depends(get_current_user)):
+async def recall(memory_id: str, user: User = CurrentUser):
     """
     Retrieve a stored memory by ID.
     Returns 404 if the memory doesn't exist or has expired.
-    Requires Auth -> user: User = Depends(get_current_user)
+    Requires Auth -> user: User = CurrentUser
     """
-    result = await redis_service.recall(user.id, memory_id)
+    # raw_data: the stored JSON is passed through to the response untouched
+    result = await redis_service.recall(user.id, memory_id, raw_data=True)
 
     if result is None:
         raise HTTPException(
@@ -130,25 +149,30 @@ async def recall(memory_id: str, user: User = Depends(get_current_user)):
             detail=f"Memory '{memory_id}' not found or expired."
         )
 
-    return RecallResponse(
-        memory_id=memory_id,
-        data=result["data"],
-        ttl_remaining=result["ttl_remaining"]
-    )
+    return ORJSONResponse({
+        "memory_id": memory_id,
+        "data": result["data"],
+        "ttl_remaining": result["ttl_remaining"],
+    })
 
 @app.patch("/update/{memory_id}", response_model=UpdateResponse)
-async def update(memory_id: str, request: UpdateRequest, user: User = Depends(get_current_user)):
+async def update(memory_id: str, request: UpdateRequest, user: User = CurrentUser):
     """
     Update stored data, extend TTL, or both.
-    Requires Auth -> user: User = Depends(get_current_user)
+    Requires Auth -> user: User = CurrentUser
     """
 
-    result = await redis_service.update(
-        user_id=user.id,
-        memory_id=memory_id,
-        data=request.data,
-        extra_time=request.extra_time,
-    )
+    try:
+        result = await redis_service.update(
+            user_id=user.id,
+            memory_id=memory_id,
+            data=request.data,
+            extra_time=request.extra_time,
+            max_ttl=user.max_ttl_seconds, # Enforce tier limits on extended TTL
+            raw_data=True,
+        )
+    except orjson.JSONEncodeError as exc:
+        raise _unstorable_data(exc) from exc
 
     if result is None:
         raise HTTPException(
@@ -156,28 +180,20 @@ async def update(memory_id: str, request: UpdateRequest, user: User = Depends(ge
             detail=f"Memory '{memory_id}' not found or expired"
         )
     
-    # Enfore tier limits on extended TTL
     new_ttl = result["ttl_remaining"]
-    if new_ttl > user.max_ttl_seconds:
-        new_ttl = user.max_ttl_seconds
-        await redis_service._client.expire(
-            redis_service._make_key(user.id, memory_id),
-            new_ttl
-        )
+    expires_at = int(time.time()) + new_ttl
 
-    expires_at = datetime.now(timezone.utc) + timedelta(seconds=result["ttl_remaining"])
-
-    return UpdateResponse(
-        memory_id=memory_id,
-        data=result["data"],
-        ttl_remaining=new_ttl,
-        expires_at= expires_at,
-    )
+    return ORJSONResponse({
+        "memory_id": memory_id,
+        "data": result["data"],
+        "ttl_remaining": new_ttl,
+        "expires_at": expires_at,
+    })
 
 @app.delete("/stash/{memory_id}", status_code=204)
 async def delete_stash(
     memory_id: str,
-    user: User = Depends(get_current_user),
+    user: User = CurrentUser,
 ):
     """Delete a stash immediately."""
     deleted = await redis_service.delete(user.id, memory_id)
@@ -190,9 +206,13 @@ async def delete_stash(
     
     return None  # 204 No Content
 
-@app.get("/health")
-async def health_check():
-    """Detailed health check endpoint."""
+# Health results are reused briefly so frequent load balancer polls
+# don't ping Redis and PostgreSQL on every hit
+HEALTH_CACHE_SECONDS = 2
+_health_cache: TTLCache = TTLCache(maxsize=1, ttl=HEALTH_CACHE_SECONDS)
+
+async def _do_health_check() -> dict:
+    """Ping Redis and the user database and build the health report."""
 
     try:
         await redis_service._client.ping()
@@ -215,4 +235,13 @@ async def health_check():
             "redis": redis_status,
             "user_db": db_status,
         }
-    }
\ No newline at end of file
+    }
+
+@app.get("/health")
+async def health_check():
+    """Detailed health check endpoint."""
+    result = _health_cache.get("health")
+    if result is None:
+        result = await _do_health_check()
+        _health_cache["health"] = result
+    return result
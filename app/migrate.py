@@ -0,0 +1,89 @@
+"""
+Database migrations.
+
+These change existing tables, so they run as a separate deploy step rather
+than on app startup:
+
+    python -m app.migrate
+
+Every step is idempotent. Indexes are built with CONCURRENTLY so a populated
+users table keeps accepting writes; that can't run inside a transaction, so
+each statement is executed on its own.
+
+Replicas starting together each run this, so runs are serialized with a
+session-level advisory lock. An index build in progress also reads as
+invalid, so invalid indexes are only treated as stale once the lock is held.
+"""
+
+import asyncio
+
+import asyncpg
+
+from app.core.config import get_settings
+from app.core.logging import get_logger, setup_logging
+from app.services.user_db import CREATE_USERS_TABLE_SQL
+
+logger = get_logger(__name__)
+
+# Advisory lock key shared by every migrate() run
+MIGRATION_LOCK_ID = 0x5354_4153  # "STAS"
+LOCK_POLL_SECONDS = 0.5
+
+async def _acquire_lock(conn: asyncpg.Connection) -> None:
+    """
+    Wait for the migration lock.
+
+    Polls pg_try_advisory_lock rather than blocking in pg_advisory_lock:
+    a blocked statement holds a snapshot, and CREATE INDEX CONCURRENTLY in
+    the run holding the lock would wait on that snapshot forever.
+    """
+    while not await conn.fetchval("SELECT pg_try_advisory_lock($1)", MIGRATION_LOCK_ID):
+        logger.info("migration_lock_wait")
+        await asyncio.sleep(LOCK_POLL_SECONDS)
+
+async def _drop_if_invalid(conn: asyncpg.Connection, index_name: str) -> None:
+    """
+    Drop an index left invalid by an interrupted concurrent build.
+
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS would otherwise skip it forever.
+    Call only while holding the migration lock, so the index can't be one
+    another run is still building.
+    """
+    valid = await conn.fetchval(
+        "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass($1)",
+        index_name,
+    )
+    if valid is False:
+        logger.info("dropping_invalid_index", index=index_name)
+        await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
+
+async def migrate(database_url: str) -> None:
+    """Bring the user database schema up to date."""
+    conn = await asyncpg.connect(database_url)
+    try:
+        await _acquire_lock(conn)
+        await conn.execute(CREATE_USERS_TABLE_SQL)
+
+        # Covering index so auth lookups are served by an index-only scan
+        await _drop_if_invalid(conn, "idx_users_api_key_hash_cover")
+        await conn.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_api_key_hash_cover
+            ON users(api_key_hash) INCLUDE (id, tier)
+        """)
+
+        # The UNIQUE constraint already indexes api_key_hash, so the old
+        # plain index is a duplicate. Dropped only once its replacement exists.
+        await conn.execute("""
+            DROP INDEX CONCURRENTLY IF EXISTS idx_users_api_key_hash
+        """)
+    finally:
+        try:
+            await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+        finally:
+            await conn.close()
+
+    logger.info("user_db_migrated")
+
+if __name__ == "__main__":
+    setup_logging()
+    asyncio.run(migrate(get_settings().database_url))
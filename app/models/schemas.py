@@ -7,9 +7,8 @@ These models serve 3 purposes:
 3. Generate OpenAPI documentation automatically. 
 """
 
-from pydantic import BaseModel, Field, field_validator, model_validator
+from pydantic import BaseModel, Field, model_validator
 from typing  import Any, Optional
-from datetime import datetime
 
 # ============================================================
 # REQUEST MODELS (what the client sends to us)
@@ -38,16 +37,6 @@ class StashRequest(BaseModel):
         le=86400,       # less than or equal to 24 hours
         description="Time-to-live in seconds (1 to 864000)"
     )
-
-    @field_validator('ttl')
-    @classmethod
-    def ttl_must_be_reasonable(cls, v: int) -> int:
-        """
-        Ensure TTL is within acceptable bounds.
-        """
-        if v < 1:
-            raise ValueError('TTL must be at least 1 second')
-        return v
     
     model_config = {
         "json_schema_extra": {
@@ -112,9 +101,9 @@ class StashResponse(BaseModel):
         description="Time-to-live in seconds"
     )
 
-    expires_at: datetime = Field(
+    expires_at: int = Field(
         ...,
-        description="UTC timestamp when this memory expires"
+        description="Unix timestamp (seconds, UTC) when this memory expires"
     )
 
 class RecallResponse(BaseModel):
@@ -134,7 +123,7 @@ class UpdateResponse(BaseModel):
     memory_id: str = Field(..., description="The memory_id")
     data: Any = Field(..., description="The stored data")
     ttl_remaining: int = Field(..., description="Seconds until expiration")
-    expires_at: datetime = Field(..., description="Expiration timestamp")
+    expires_at: int = Field(..., description="Expiration unix timestamp (seconds, UTC)")
 
 class ErrorResponse(BaseModel):
     """
@@ -6,16 +6,104 @@ It also provides a fallback to fakeredis for local development.
 """
 
 import json
+import orjson
+import time
 import redis.asyncio as redis
 from redis.asyncio import Redis
+from redis.commands.core import AsyncScript
 from typing import Any, Optional
-from datetime import datetime, timezone
 import fakeredis.aioredis
 from app.core.logging import get_logger
 from app.core.config import get_settings
 
 logger = get_logger(__name__)
 
+# Lua scripts run atomically inside Redis in a single round-trip, so a key
+# can't expire between reading its value and its TTL.
+
+# KEYS[1] = key
+# Returns {value, ttl} or nil if the key doesn't exist.
+RECALL_SCRIPT = b"""
+local value = redis.call('GET', KEYS[1])
+if not value then
+    return nil
+end
+return {value, redis.call('TTL', KEYS[1])}
+"""
+
+# KEYS[1] = key
+# ARGV[1] = seconds to add to the TTL (0 for none)
+# ARGV[2] = TTL cap (-1 for none)
+# ARGV[3] = replacement record body without its opening brace, or '' to keep the data
+# Returns {value, new_ttl} or nil if the key doesn't exist or has no expiry.
+# For replacements the returned value is '' since the caller already has it.
+UPDATE_SCRIPT = b"""
+local ttl = redis.call('TTL', KEYS[1])
+if ttl < 0 then
+    return nil
+end
+
+local new_ttl = ttl + tonumber(ARGV[1])
+local max_ttl = tonumber(ARGV[2])
+if max_ttl >= 0 and new_ttl > max_ttl then
+    new_ttl = max_ttl
+end
+
+if ARGV[3] == '' then
+    redis.call('EXPIRE', KEYS[1], new_ttl)
+    return {redis.call('GET', KEYS[1]), new_ttl}
+end
+
+-- Carry created_at_ts over from the old record (stored first by stash)
+local old = redis.call('GET', KEYS[1])
+local meta = string.match(old, '^{"created_at_ts":%d+,') or '{'
+redis.call('SET', KEYS[1], meta .. ARGV[3], 'EX', new_ttl)
+return {'', new_ttl}
+"""
+
+# Stored records are {<integer metadata>..., "data": <data>} with data last,
+# so the raw JSON of the data can be sliced out without parsing it.
+_RECORD_PREFIXES = (b'{"created_at_ts":', b'{"updated_at_ts":')
+_DATA_MARKER = b',"data":'
+
+def _split_record(value: bytes) -> Optional[tuple[dict, bytes]]:
+    """
+    Split a stored record into its metadata and the raw JSON of its data.
+
+    Returns None for records in an older layout; parse those in full.
+    """
+    if not value.startswith(_RECORD_PREFIXES):
+        return None
+    # Metadata values are integers, so the first marker is the envelope key
+    index = value.find(_DATA_MARKER)
+    if index < 0:
+        return None
+    return orjson.loads(value[:index] + b"}"), value[index + len(_DATA_MARKER):-1]
+
+def _load_record(value: bytes, raw_data: bool) -> tuple[dict, Any]:
+    """
+    Parse a stored record into its fields and its data.
+
+    With raw_data the data is returned as an orjson.Fragment of its JSON.
+    Records in the older layout were written with the stdlib json module,
+    which allows integers wider than 64 bits, so they're read back with it
+    too; orjson would round those to floats and can't serialize them.
+    """
+    split = _split_record(value) if raw_data else None
+    if split is not None:
+        parsed, raw = split
+        return parsed, orjson.Fragment(raw)
+
+    if value.startswith(_RECORD_PREFIXES):
+        parsed = orjson.loads(value)
+        return parsed, parsed["data"]
+
+    parsed = json.loads(value)
+    data = parsed["data"]
+    if raw_data:
+        data = orjson.Fragment(json.dumps(data))
+    return parsed, data
+
 class RedisService:
     """
     Async Redis client wrapper with TTL-aware operations.
@@ -27,6 +115,9 @@ class RedisService:
     def __init__(self):
         self._client: Optional[Redis] = None
         self._settings = get_settings()
+        # Not bound to a client, so they follow whatever _client is current
+        self._recall_script = AsyncScript(None, RECALL_SCRIPT)
+        self._update_script = AsyncScript(None, UPDATE_SCRIPT)
     
     async def connect(self) -> None:
         """
@@ -38,8 +129,7 @@ class RedisService:
         try:
             self._client = redis.from_url(
                 self._settings.redis_url,
-                encoding="utf-8",
-                decode_responses=True, # Return strings, not bytes
+                decode_responses=False, # Return raw bytes; orjson parses them directly
             )
 
             # Test the connection
@@ -49,8 +139,7 @@ class RedisService:
             print("✗ Redis not available, using fakeredis")
             # Fall back to fakeredis for local development
             self._client = fakeredis.aioredis.FakeRedis(
-                encoding="utf-8",
-                decode_responses=True,
+                decode_responses=False,
             )
     
     async def disconnect(self) -> None:
@@ -84,14 +173,19 @@ class RedisService:
             
         Returns:
             True if stored successfully
+
+        Raises:
+            orjson.JSONEncodeError: If data can't be serialized, such as
+                integers wider than 64 bits
         """
 
         key = self._make_key(user_id, memory_id)
 
-        # Serialize to JSON string
-        value = json.dumps({
+        # Serialize to JSON bytes
+        # created_at_ts goes first so update can carry it over (see UPDATE_SCRIPT)
+        value = orjson.dumps({
+            "created_at_ts": int(time.time()), # unix seconds
             "data": data,
-            "created_at": datetime.now(timezone.utc).isoformat(),
         })
 
         # SETEX: SET with Expiry - atomic operation
@@ -108,13 +202,16 @@ class RedisService:
 
         return True
     
-    async def recall(self, user_id: str, memory_id: str) -> Optional[dict]:
+    async def recall(self, user_id: str, memory_id: str, raw_data: bool = False) -> Optional[dict]:
         """
         Retrieve stored data if it exists and hasn't expired.
         
         Args:
             user_id: The authenticated user's ID
             memory_id: The memory to retrieve
+            raw_data: If True, 'data' is an orjson.Fragment of the stored JSON
+                instead of parsed Python objects. orjson embeds it as-is when
+                serializing a response, skipping a decode/re-encode.
             
         Returns:
             Dict with 'data' and 'ttl_remaining', or None if not found
@@ -122,19 +219,16 @@ class RedisService:
 
         key = self._make_key(user_id, memory_id)
 
-        # Get the value
-        value = await self._client.get(key)
-        if value is None:
+        # Get the value and remaining TTL together
+        result = await self._recall_script(keys=[key], client=self._client)
+        if result is None:
             return None
-        
-        # Get remaining TTL
-        ttl = await self._client.ttl(key)
 
-        if ttl < 0: # -1 means no expiry, -2 means doesn't exist
+        value, ttl = result
+        if ttl < 0: # -1 means no expiry
             return None
         
-        # Parse JSON
-        parsed = json.loads(value)
+        parsed, data = _load_record(value, raw_data)
 
         # Log the operation
         logger.info(
@@ -146,12 +240,12 @@ class RedisService:
         )
 
         return {
-            "data": parsed["data"],
+            "data": data,
             "ttl_remaining": ttl,
-            "created_at": parsed.get("created_at"),
+            "created_at_ts": parsed.get("created_at_ts"),
         }
     
-    async def update(self, user_id: str, memory_id: str, data: Optional[Any] = None, extra_time: Optional[int] = None ) -> Optional[dict]:
+    async def update(self, user_id: str, memory_id: str, data: Optional[Any] = None, extra_time: Optional[int] = None, max_ttl: Optional[int] = None, raw_data: bool = False) -> Optional[dict]:
         """
         Update stored data and/or extend TTL.
         
@@ -159,41 +253,50 @@ class RedisService:
             user_id: The authenticated user's ID
             memory_id: The memory to update
             data: If provided, replaces entire stored data
-            extra_seconds: If provided, adds to remaining TTL
+            extra_time: If provided, adds to remaining TTL
+            max_ttl: If provided, caps the new TTL (tier limit) in the same write
+            raw_data: If True and only the TTL changes, 'data' is an
+                orjson.Fragment of the stored JSON (see recall)
             
         Returns:
             Dict with 'ttl_remaining', or None if memory not found
+
+        Raises:
+            orjson.JSONEncodeError: If data can't be serialized (see stash)
         """
 
         key = self._make_key(user_id, memory_id)
 
-        # Get Current Value
-        value = await self._client.get(key)
-        if value is None:
-            return None
-        
-        # Get Current TTL
-        current_ttl = await self._client.ttl(key)
-        if current_ttl < 0:
-            return None
-        
-        # Parse existing data
-        parsed = json.loads(value)
+        if data is None:
+            # TTL-only change: Redis just moves the expiry and hands back
+            # the stored value for the response
+            body = b""
+        else:
+            # Replacement record, minus the opening brace so the script
+            # can prepend the existing created_at_ts
+            body = orjson.dumps({
+                "updated_at_ts": int(time.time()),
+                "data": data, # data stays last (see _split_record)
+            })[1:]
 
-        if data is not None:
-            parsed["data"] = data
-        
-        # Calculate new TTL
-        new_ttl = current_ttl
-        if extra_time is not None:
-            new_ttl = current_ttl + extra_time
-        
-        # Update the record
-        parsed["updated_at"] = datetime.now(timezone.utc).isoformat()
-        new_value = json.dumps(parsed)
+        result = await self._update_script(
+            keys=[key],
+            args=[
+                extra_time or 0,
+                max_ttl if max_ttl is not None else -1,
+                body,
+            ],
+            client=self._client,
+        )
+        if result is None:
+            return None
 
-        # Save with new TTL
-        await self._client.setex(key, new_ttl, new_value)
+        value, new_ttl = result
+        if data is None:
+            _, data = _load_record(value, raw_data)
+            payload_bytes = len(value)
+        else:
+            payload_bytes = len(body) + 1
 
         # Log the operation
         logger.info(
@@ -201,11 +304,11 @@ class RedisService:
             user_id=user_id,
             memory_id=memory_id,
             ttl_seconds=new_ttl,
-            payload_bytes=len(new_value),
+            payload_bytes=payload_bytes,
         )
 
         return {
-            "data": parsed["data"],
+            "data": data,
             "ttl_remaining": new_ttl
         }
 
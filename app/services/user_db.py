@@ -7,13 +7,41 @@ Production-ready persistent storage for user and API keys
 import asyncpg
 import hashlib
 import secrets
-from typing import Optional
+from typing import Callable, Optional
 
 from app.core.config import get_settings
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Session settings applied to every pooled connection.
+# Auth lookups are tiny single-row reads, so JIT compilation only adds latency.
+SERVER_SETTINGS = {
+    "application_name": "stash",
+    "jit": "off",
+}
+
+# Base schema, created on connect so a fresh database works out of the box.
+# Changes to existing tables go in app/migrate.py instead.
+CREATE_USERS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS users (
+        id TEXT PRIMARY KEY,
+        tier TEXT NOT NULL DEFAULT 'free',
+        api_key_hash TEXT UNIQUE NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        key_created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    )
+"""
+
+# Auth lookup query. asyncpg caches prepared statements per connection keyed
+# on the query text, so keeping this a single constant means every auth after
+# the first on a connection skips the server-side parse and plan.
+GET_USER_BY_KEY_HASH_SQL = """
+    SELECT id, tier
+    FROM users
+    WHERE api_key_hash = $1
+"""
+
 class UserDB:
     """
     PostgreSQL-based user and API key storage
@@ -26,35 +54,38 @@ class UserDB:
     def __init__(self):
         self._settings = get_settings()
         self._pool: Optional[asyncpg.Pool] = None
+        self._revoke_listeners: list[Callable[[str], None]] = []
     
     @staticmethod
     def hash_key(api_key: str) -> str:
         """Hash an API key for secure storage"""
+        # hashlib's SHA-256 is backed by OpenSSL, which uses SHA-NI when the
+        # CPU has it. Changing algorithms would invalidate every stored hash.
         return hashlib.sha256(api_key.encode()).hexdigest()
     
+    @classmethod
+    def generate_key(cls) -> tuple[str, str]:
+        """Generate a new plaintext API key and its hash."""
+        api_key = f"sk_{secrets.token_urlsafe(24)}"
+        return api_key, cls.hash_key(api_key)
+    
+    def on_key_revoked(self, listener: Callable[[str], None]) -> None:
+        """Register a callback, called with the old key hash when a key is replaced."""
+        self._revoke_listeners.append(listener)
+    
     async def connect(self) -> None:
         """Initialize the database connection pool and create tables"""
         self._pool = await asyncpg.create_pool(
             self._settings.database_url,
-            min_size=2,
-            max_size=10,
+            min_size=self._settings.database_pool_min_size,
+            max_size=self._settings.database_pool_max_size,
+            max_inactive_connection_lifetime=300,
+            server_settings=SERVER_SETTINGS,
         )
 
+        # Index changes are not made here; run `python -m app.migrate`
         async with self._pool.acquire() as conn:
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    id TEXT PRIMARY KEY,
-                    tier TEXT NOT NULL DEFAULT 'free',
-                    api_key_hash TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-                    key_created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-                )
-            """)
-            
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_users_api_key_hash 
-                ON users(api_key_hash)
-            """)
+            await conn.execute(CREATE_USERS_TABLE_SQL)
         
         logger.info("user_db_connected", database="postgresql")
     
@@ -68,19 +99,23 @@ class UserDB:
         """
         Look up a user by their API key.
         
-        Returns dict with user info, or None if key is invalid.
+        Returns dict with 'id' and 'tier', or None if key is invalid.
+        Hot keys are cached by get_current_user, not here.
+        """
+        return await self.get_user_by_key_hash(self.hash_key(api_key))
+    
+    async def get_user_by_key_hash(self, key_hash: str) -> Optional[dict]:
         """
-        key_hash = self.hash_key(api_key)
+        Look up a user by the hash of their API key.
         
+        For callers that already hashed the key, such as get_current_user.
+        Returns dict with 'id' and 'tier', or None if no key has this hash.
+        """
         async with self._pool.acquire() as conn:
-            row = await conn.fetchrow("""
-                SELECT id, tier, created_at
-                FROM users
-                WHERE api_key_hash = $1
-            """, key_hash)
+            row = await conn.fetchrow(GET_USER_BY_KEY_HASH_SQL, key_hash)
             
             if row is None:
-                logger.info("api_key_invalid", key_prefix=api_key[:10])
+                logger.info("api_key_invalid", key_hash_prefix=key_hash[:10])
                 return None
         
         logger.info("api_key_used", user_id=row["id"])
@@ -88,7 +123,6 @@ class UserDB:
         return {
             "id": row["id"],
             "tier": row["tier"],
-            "created_at": row["created_at"].isoformat(),
         }
     
     async def create_user(self, user_id: str, tier: str = "free") -> Optional[str]:
@@ -97,8 +131,7 @@ class UserDB:
         
         Returns the plaintext API key, or None if user already exists.
         """
-        api_key = f"sk_{secrets.token_urlsafe(24)}"
-        key_hash = self.hash_key(api_key)
+        api_key, key_hash = self.generate_key()
         
         try:
             async with self._pool.acquire() as conn:
@@ -113,7 +146,30 @@ class UserDB:
         except asyncpg.UniqueViolationError:
             logger.info("user_exists", user_id=user_id)
             return None
-    
+
+    async def bulk_create_users(self, specs: list[tuple[str, str]]) -> list[Optional[str]]:
+        """
+        Create several users in a single INSERT.
+
+        Takes (user_id, tier) pairs and returns the plaintext API keys in
+        the same order, with None for users that already exist.
+        """
+        ids = [user_id for user_id, _ in specs]
+        tiers = [tier for _, tier in specs]
+        keys, hashes = zip(*(self.generate_key() for _ in specs)) if specs else ((), ())
+
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch("""
+                INSERT INTO users (id, tier, api_key_hash)
+                SELECT * FROM UNNEST($1::text[], $2::text[], $3::text[])
+                ON CONFLICT (id) DO NOTHING
+                RETURNING id
+            """, ids, tiers, list(hashes))
+
+        created = {row["id"] for row in rows}
+        logger.info("users_created", user_ids=sorted(created))
+        return [key if user_id in created else None for user_id, key in zip(ids, keys)]
+
 
     async def get_user(self, user_id: str) -> Optional[dict]:
         """Get user by ID."""
@@ -138,29 +194,37 @@ class UserDB:
         """
         Generate a new API key for an existing user.
         
-        The old key immediately stops working.
+        The old key hash is passed to on_key_revoked listeners, so this
+        process stops accepting the old key at once. Other API workers keep
+        it cached for up to auth_cache_ttl_seconds.
         Returns the new plaintext key, or None if user doesn't exist.
         """
-        api_key = f"sk_{secrets.token_urlsafe(24)}"
-        key_hash = self.hash_key(api_key)
+        api_key, key_hash = self.generate_key()
         
         async with self._pool.acquire() as conn:
-            result = await conn.execute("""
-                UPDATE users 
+            old_hash = await conn.fetchval("""
+                UPDATE users AS u
                 SET api_key_hash = $1, key_created_at = NOW()
-                WHERE id = $2
+                FROM (SELECT id, api_key_hash FROM users WHERE id = $2 FOR UPDATE) AS old
+                WHERE u.id = old.id
+                RETURNING old.api_key_hash
             """, key_hash, user_id)
         
-        # Check if any row was updated
-        if result.split()[-1] == "0":
+        if old_hash is None:
             return None
         
+        for listener in self._revoke_listeners:
+            listener(old_hash)
+        
         logger.info("api_key_regenerated", user_id=user_id)
         return api_key
     
     async def seed_demo_users(self) -> dict:
         """
         Create demo users for development.
+
+        Skips all work when the demo users already exist, otherwise inserts
+        the missing ones in a single transaction.
         
         Returns dict of tier -> api_key for newly created users.
         """
@@ -171,12 +235,28 @@ class UserDB:
             ("user_pro_001", "pro"),
             ("user_ent_001", "enterprise"),
         ]
+        demo_ids = [user_id for user_id, _ in demo_users]
         
-        for user_id, tier in demo_users:
-            api_key = await self.create_user(user_id, tier)
-            if api_key:
-                demo_keys[tier] = api_key
+        async with self._pool.acquire() as conn:
+            existing = await conn.fetchval("""
+                SELECT COUNT(*) FROM users WHERE id = ANY($1::text[])
+            """, demo_ids)
+            if existing == len(demo_users):
+                return demo_keys
+            
+            async with conn.transaction():
+                for user_id, tier in demo_users:
+                    api_key, key_hash = self.generate_key()
+                    created = await conn.fetchval("""
+                        INSERT INTO users (id, tier, api_key_hash)
+                        VALUES ($1, $2, $3)
+                        ON CONFLICT (id) DO NOTHING
+                        RETURNING id
+                    """, user_id, tier, key_hash)
+                    if created is not None:
+                        demo_keys[tier] = api_key
         
+        logger.info("demo_users_seeded", tiers=list(demo_keys))
         return demo_keys
 
 
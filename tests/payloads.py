@@ -0,0 +1,13 @@
+"""
+Request bodies shared across test modules.
+
+Encoded once at import; send them with content= and JSON_CONTENT.
+"""
+
+from types import MappingProxyType
+
+import orjson
+
+STASH_BODY = orjson.dumps({"data": {"test": "data"}, "ttl": 60})
+STASH_BODY_24H = orjson.dumps({"data": {"test": "data"}, "ttl": 86400})
+JSON_CONTENT = MappingProxyType({"content-type": "application/json"})
@@ -19,15 +19,10 @@ async def test_delete_nonexistent_memory(client: AsyncClient, free_user_headers)
 
 
 @pytest.mark.anyio
-async def test_delete_other_users_memory(client: AsyncClient, free_user_headers, pro_user_headers):
+async def test_delete_other_users_memory(client: AsyncClient, stash_factory, free_user_headers, pro_user_headers):
     """Verify that a user cannot delete another user's stash."""
     # Free user creates a stash
-    response = await client.post(
-        "/stash",
-        headers=free_user_headers,
-        json={"data": {"private": "data"}, "ttl": 300},
-    )
-    memory_id = response.json()["memory_id"]
+    memory_id = await stash_factory(free_user_headers, {"private": "data"}, ttl=300)
 
     # Pro user tries to delete it
     response = await client.delete(
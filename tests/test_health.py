@@ -4,9 +4,9 @@ import pytest
 
 
 @pytest.mark.anyio
-async def test_health_returns_status(client):
+async def test_health_returns_status(call):
     """Health endpoint should return healthy status."""
-    response = await client.get("/health")
+    response = await call("GET", "/health")
 
     assert response.status_code == 200
     data = response.json()
@@ -16,12 +16,30 @@ async def test_health_returns_status(client):
 
 
 @pytest.mark.anyio
-async def test_health_checks_services(client):
+async def test_health_checks_services(call):
     """Health endpoint should report Redis and DB connection status."""
-    response = await client.get("/health")
+    response = await call("GET", "/health")
 
     assert response.status_code == 200
     data = response.json()
     checks = data["checks"]
     assert checks["redis"] == "connected"
     assert checks["user_db"] == "connected"
+
+
+@pytest.mark.anyio
+async def test_health_result_is_cached(call, monkeypatch):
+    """Health checks within the cache window should not re-ping services."""
+    from app import main
+
+    main._health_cache.clear()
+    first = await call("GET", "/health")
+
+    async def fail_check():
+        raise AssertionError("health check should be served from cache")
+
+    monkeypatch.setattr(main, "_do_health_check", fail_check)
+    second = await call("GET", "/health")
+
+    assert second.status_code == 200
+    assert second.json() == first.json()
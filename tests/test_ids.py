@@ -0,0 +1,23 @@
+"""
+Tests for memory ID generation.
+"""
+
+import re
+
+from app.core import ids
+
+
+def test_memory_ids_are_url_safe_and_unique():
+    """IDs should be 8 URL-safe characters and not repeat across batches."""
+    generated = [ids.new_memory_id() for _ in range(ids.BATCH_SIZE * 3)]
+
+    assert all(re.fullmatch(r"[A-Za-z0-9_-]{8}", memory_id) for memory_id in generated)
+    assert len(set(generated)) == len(generated)
+
+
+def test_pool_refills_when_empty():
+    """An empty pool should be refilled with a full batch."""
+    ids._id_pool.clear()
+    ids.new_memory_id()
+
+    assert len(ids._id_pool) == ids.BATCH_SIZE - 1
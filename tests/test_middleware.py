@@ -5,17 +5,52 @@ Tests for middleware (payload size limits).
 import pytest
 from httpx import AsyncClient
 
+from tests.payloads import JSON_CONTENT, STASH_BODY
+
 
 @pytest.mark.anyio
 async def test_oversized_payload_returns_413(client: AsyncClient, free_user_headers):
     """Verify that payloads exceeding 1MB are rejected with 413."""
     response = await client.post(
         "/stash",
-        headers={**free_user_headers, "content-length": "2000000"},
-        json={"data": {"test": "data"}, "ttl": 60},
+        headers=free_user_headers,
+        content=b"x" * (1024 * 1024 + 1),
     )
 
     assert response.status_code == 413
     data = response.json()
     assert data["error"] == "Payload Too Large"
     assert "limit_bytes" in data
+
+
+@pytest.mark.anyio
+async def test_declared_oversize_rejected_before_body(client: AsyncClient, free_user_headers):
+    """Verify that the declared content-length alone triggers the 413."""
+    response = await client.post(
+        "/stash",
+        headers={**free_user_headers, "content-length": "2000000"},
+        content=b"x",
+    )
+
+    assert response.status_code == 413
+    assert response.json()["detail"].startswith("Request body (2000000 bytes)")
+
+
+@pytest.mark.anyio
+async def test_payload_within_limit_passes(client: AsyncClient, free_user_headers):
+    """Verify that payloads under the limit reach the route handler."""
+    response = await client.post(
+        "/stash",
+        headers={**free_user_headers, **JSON_CONTENT},
+        content=STASH_BODY,
+    )
+
+    assert response.status_code == 200
+
+
+@pytest.mark.anyio
+async def test_get_requests_skip_size_check(client: AsyncClient):
+    """Verify that non-mutating requests are never size-checked."""
+    response = await client.get("/", headers={"content-length": "2000000"})
+
+    assert response.status_code == 200
@@ -0,0 +1,58 @@
+"""
+Tests for the in-process token bucket rate limiter.
+"""
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import get_settings
+from app.core.ratelimit import TokenBucket, rate_limiter
+
+
+def test_bucket_allows_burst_then_blocks():
+    """A fresh bucket should allow exactly `capacity` immediate requests."""
+    bucket = TokenBucket()
+
+    results = [bucket.allow("user", rate_per_minute=60, capacity=3) for _ in range(4)]
+
+    assert results == [True, True, True, False]
+
+
+def test_bucket_refills_over_time(monkeypatch):
+    """Tokens should refill at rate_per_minute."""
+    now = 1000.0
+    monkeypatch.setattr("app.core.ratelimit.time.monotonic", lambda: now)
+    bucket = TokenBucket()
+
+    assert bucket.allow("user", rate_per_minute=60, capacity=1)
+    assert not bucket.allow("user", rate_per_minute=60, capacity=1)
+
+    now += 1.0  # 60/min refills one token per second
+    assert bucket.allow("user", rate_per_minute=60, capacity=1)
+
+
+def test_buckets_are_per_user():
+    """One user exhausting their bucket must not affect another."""
+    bucket = TokenBucket()
+
+    assert bucket.allow("a", rate_per_minute=60, capacity=1)
+    assert not bucket.allow("a", rate_per_minute=60, capacity=1)
+    assert bucket.allow("b", rate_per_minute=60, capacity=1)
+
+
+@pytest.mark.anyio
+async def test_rate_limit_returns_429(client: AsyncClient, free_user_headers, monkeypatch):
+    """Verify that exceeding the free tier burst returns 429 when enabled."""
+    monkeypatch.setattr(get_settings(), "rate_limit_enabled", True)
+    rate_limiter.reset("test_free")
+
+    statuses = []
+    for _ in range(11):  # free tier burst is 10
+        response = await client.get("/recall/nonexistent123", headers=free_user_headers)
+        statuses.append(response.status_code)
+
+    rate_limiter.reset("test_free")
+
+    assert statuses[:10] == [404] * 10
+    assert statuses[10] == 429
+    assert "Retry-After" in response.headers
@@ -0,0 +1,86 @@
+"""
+Tests for RedisService operations.
+"""
+
+import pytest
+from app.services.redis_service import redis_service
+
+
+@pytest.mark.anyio
+async def test_update_replace_keeps_created_at(client):
+    """Replacing data should keep the original created_at_ts and cap the TTL."""
+    await redis_service.stash("svc_user", "mem1", {"v": 1}, ttl_seconds=100)
+    created_at_ts = (await redis_service.recall("svc_user", "mem1"))["created_at_ts"]
+
+    result = await redis_service.update(
+        "svc_user", "mem1", data={"v": 2}, extra_time=500, max_ttl=300,
+    )
+
+    assert result["data"] == {"v": 2}
+    assert result["ttl_remaining"] == 300
+
+    recalled = await redis_service.recall("svc_user", "mem1")
+    assert recalled["data"] == {"v": 2}
+    assert recalled["created_at_ts"] == created_at_ts
+
+
+@pytest.mark.anyio
+async def test_update_missing_key_returns_none(client):
+    """Updating a key that doesn't exist must not create it."""
+    result = await redis_service.update("svc_user", "missing", data={"v": 1})
+
+    assert result is None
+    assert await redis_service.recall("svc_user", "missing") is None
+
+
+@pytest.mark.anyio
+async def test_recall_raw_data_passes_stored_json_through(client):
+    """raw_data should return the stored JSON as a fragment, nested keys intact."""
+    import orjson
+
+    data = {"x": {"data": [1, 2]}, "created_at_ts": "user value"}
+    await redis_service.stash("svc_user", "mem2", data, ttl_seconds=100)
+
+    result = await redis_service.recall("svc_user", "mem2", raw_data=True)
+
+    assert isinstance(result["data"], orjson.Fragment)
+    assert orjson.loads(orjson.dumps({"d": result["data"]}))["d"] == data
+    assert result["created_at_ts"] is not None
+
+
+@pytest.mark.anyio
+async def test_recall_legacy_record_layout(client, free_user_headers):
+    """Records written with data first (older layout) must still be readable."""
+    await redis_service._client.setex(
+        redis_service._make_key("test_free", "legacy1"),
+        100,
+        b'{"data":{"a":1},"created_at":"2024-01-15T10:30:00+00:00"}',
+    )
+
+    response = await client.get("/recall/legacy1", headers=free_user_headers)
+
+    assert response.status_code == 200
+    assert response.json()["data"] == {"a": 1}
+
+
+@pytest.mark.anyio
+async def test_legacy_record_keeps_wide_integers(client, free_user_headers):
+    """Older records may hold integers orjson can't handle; recall and extend must return them exactly."""
+    wide = 123456789012345678901234567890
+    await redis_service._client.setex(
+        redis_service._make_key("test_free", "legacy2"),
+        100,
+        b'{"data": {"n": %d}, "created_at_ts": 1700000000}' % wide,
+    )
+
+    response = await client.get("/recall/legacy2", headers=free_user_headers)
+
+    assert response.status_code == 200
+    assert response.json()["data"] == {"n": wide}
+
+    response = await client.patch(
+        "/update/legacy2", headers=free_user_headers, json={"extra_time": 60},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["data"] == {"n": wide}
@@ -5,10 +5,12 @@ Tests for the /stash endpoint
 import pytest
 from httpx import AsyncClient
 
+from tests.payloads import JSON_CONTENT, STASH_BODY
+
 @pytest.mark.anyio
-async def test_root(client):
+async def test_root(call):
     """Test root endpoint returns status."""
-    response = await client.get("/")
+    response = await call("GET", "/")
     
     assert response.status_code == 200
     assert response.json()["status"] == "ok"
@@ -18,19 +20,20 @@ async def test_stash_requires_auth(client: AsyncClient):
     """Verify that stash endpoint requires API key."""
     response = await client.post(
         "/stash",
-        json={"data": {"test": "data"}, "ttl": 60}
+        headers=JSON_CONTENT,
+        content=STASH_BODY,
     )
 
     assert response.status_code == 401
     assert "Missing API key" in response.json()["detail"]
 
 @pytest.mark.anyio
-async def test_stash_creates_memory(client: AsyncClient, free_user_headers):
+async def test_stash_creates_memory(call, free_user_headers):
     """Verify that stash creates a retrievable memory"""
 
     # Create a stash
-    response = await client.post(
-        "/stash",
+    response = await call(
+        "POST", "/stash",
         headers=free_user_headers,
         json={"data": {"hello": "world"}, "ttl": 60}
     )
@@ -41,10 +44,10 @@ async def test_stash_creates_memory(client: AsyncClient, free_user_headers):
     assert data["ttl"] == 60
 
 @pytest.mark.anyio
-async def test_stash_enforces_ttl_limit(client: AsyncClient, free_user_headers):
+async def test_stash_enforces_ttl_limit(call, free_user_headers):
     """Verify that free tier TTL is capped at 1 hour."""
-    response = await client.post(
-        "/stash",
+    response = await call(
+        "POST", "/stash",
         headers=free_user_headers,
         json={"data": {"test": "data"}, "ttl": 86400}  # Request 24 hours
     )
@@ -55,20 +58,15 @@ async def test_stash_enforces_ttl_limit(client: AsyncClient, free_user_headers):
     assert data["ttl"] == 3600
 
 @pytest.mark.anyio
-async def test_recall_returns_data(client: AsyncClient, free_user_headers):
+async def test_recall_returns_data(call, stash_factory, free_user_headers):
     """Verify that recall returns the stored data."""
     
     # Create a stash
-    stash_response = await client.post(
-        "/stash",
-        headers=free_user_headers,
-        json={"data": {"secret": "message"}, "ttl": 60}
-    )
-    memory_id = stash_response.json()["memory_id"]
+    memory_id = await stash_factory(free_user_headers, {"secret": "message"})
 
     # Recall it
-    recall_response = await client.get(
-        f"/recall/{memory_id}",
+    recall_response = await call(
+        "GET", f"/recall/{memory_id}",
         headers=free_user_headers,
     )
 
@@ -77,22 +75,17 @@ async def test_recall_returns_data(client: AsyncClient, free_user_headers):
     assert data["data"] == {"secret": "message"}
 
 @pytest.mark.anyio
-async def test_wall_isolation(client: AsyncClient, free_user_headers, pro_user_headers):
+async def test_wall_isolation(call, stash_factory, free_user_headers, pro_user_headers):
     """
     The Wall Test: Verify User A cannot acces User B's data.
     """
 
     # User A creates a stash
-    stash_response = await client.post(
-        "/stash",
-        headers=free_user_headers,
-        json={"data": {"private": "data"}, "ttl": 60}
-    )
-    memory_id = stash_response.json()["memory_id"]
+    memory_id = await stash_factory(free_user_headers, {"private": "data"})
     
     # User B tries to recall it
-    recall_response = await client.get(
-        f"/recall/{memory_id}",
+    recall_response = await call(
+        "GET", f"/recall/{memory_id}",
         headers=pro_user_headers,  # Different user!
     )
     
@@ -100,25 +93,20 @@ async def test_wall_isolation(client: AsyncClient, free_user_headers, pro_user_h
     assert recall_response.status_code == 404
 
 @pytest.mark.anyio
-async def test_recall_nonexistent_memory(client: AsyncClient, free_user_headers):
+async def test_recall_nonexistent_memory(call, free_user_headers):
     """Verify that recalling a nonexistent memory returns 404."""
-    response = await client.get(
-        "/recall/nonexistent123",
+    response = await call(
+        "GET", "/recall/nonexistent123",
         headers=free_user_headers,
     )
     
     assert response.status_code == 404
 
 @pytest.mark.anyio
-async def test_update_data(client, free_user_headers):
+async def test_update_data(client, stash_factory, free_user_headers):
     """Test updating stash data."""
     # Create a stash first
-    response = await client.post(
-        "/stash",
-        json={"data": {"version": 1}, "ttl": 300},
-        headers=free_user_headers,
-    )
-    memory_id = response.json()["memory_id"]
+    memory_id = await stash_factory(free_user_headers, {"version": 1}, ttl=300)
     
     # Update the data
     response = await client.patch(
@@ -135,16 +123,11 @@ async def test_update_data(client, free_user_headers):
 
 
 @pytest.mark.anyio
-async def test_update_extend_ttl(client, free_user_headers):
+async def test_update_extend_ttl(client, stash_factory, free_user_headers):
     """Test extending TTL."""
     # Create a stash
-    response = await client.post(
-        "/stash",
-        json={"data": {"test": "data"}, "ttl": 60},
-        headers=free_user_headers,
-    )
-    memory_id = response.json()["memory_id"]
-    original_ttl = response.json()["ttl"]
+    original_ttl = 60
+    memory_id = await stash_factory(free_user_headers, {"test": "data"}, ttl=original_ttl)
     
     # Extend TTL
     response = await client.patch(
@@ -155,18 +138,19 @@ async def test_update_extend_ttl(client, free_user_headers):
     
     assert response.status_code == 200
     assert response.json()["ttl_remaining"] > original_ttl
+    assert response.json()["data"] == {"test": "data"}
+
+    # Extending the TTL must leave the stored data untouched
+    response = await client.get(f"/recall/{memory_id}", headers=free_user_headers)
+    assert response.json()["data"] == {"test": "data"}
+    assert response.json()["ttl_remaining"] > original_ttl
 
 
 @pytest.mark.anyio
-async def test_update_extend_ttl_capped_by_tier(client, free_user_headers):
+async def test_update_extend_ttl_capped_by_tier(client, stash_factory, free_user_headers):
     """Verify that extending TTL beyond free tier limit gets capped at 3600."""
     # Create a stash with max free TTL
-    response = await client.post(
-        "/stash",
-        json={"data": {"test": "data"}, "ttl": 3600},
-        headers=free_user_headers,
-    )
-    memory_id = response.json()["memory_id"]
+    memory_id = await stash_factory(free_user_headers, ttl=3600)
 
     # Try to extend TTL far beyond free tier limit
     response = await client.patch(
@@ -179,6 +163,10 @@ async def test_update_extend_ttl_capped_by_tier(client, free_user_headers):
     # Free tier max is 3600, so TTL should be capped
     assert response.json()["ttl_remaining"] <= 3600
 
+    # The cap must also be applied to the stored key, not just the response
+    response = await client.get(f"/recall/{memory_id}", headers=free_user_headers)
+    assert response.json()["ttl_remaining"] <= 3600
+
 
 @pytest.mark.anyio
 async def test_update_nonexistent(client, free_user_headers):
@@ -192,15 +180,10 @@ async def test_update_nonexistent(client, free_user_headers):
     assert response.status_code == 404
     
 @pytest.mark.anyio
-async def test_delete_stash(client, free_user_headers):
+async def test_delete_stash(client, stash_factory, free_user_headers):
     """Test deleting a stash."""
     # Create a stash
-    response = await client.post(
-        "/stash",
-        json={"data": {"test": "data"}, "ttl": 300},
-        headers=free_user_headers,
-    )
-    memory_id = response.json()["memory_id"]
+    memory_id = await stash_factory(free_user_headers, ttl=300)
     
     # Delete it
     response = await client.delete(f"/stash/{memory_id}", headers=free_user_headers)
@@ -209,3 +192,60 @@ async def test_delete_stash(client, free_user_headers):
     # Verify it's gone
     response = await client.get(f"/recall/{memory_id}", headers=free_user_headers)
     assert response.status_code == 404
+
+@pytest.mark.anyio
+async def test_stash_expires_at_uses_capped_ttl(call, free_user_headers):
+    """Verify that expires_at reflects the tier-capped TTL, not the requested one."""
+    import time
+
+    response = await call(
+        "POST", "/stash",
+        headers=free_user_headers,
+        json={"data": {"test": "data"}, "ttl": 86400}
+    )
+
+    remaining = response.json()["expires_at"] - time.time()
+    assert 3590 < remaining <= 3600
+
+@pytest.mark.anyio
+async def test_stash_rejects_zero_ttl(call, free_user_headers):
+    """Verify that a TTL below 1 second is rejected by schema validation."""
+    response = await call(
+        "POST", "/stash",
+        headers=free_user_headers,
+        json={"data": {"test": "data"}, "ttl": 0}
+    )
+
+    assert response.status_code == 422
+
+# Valid JSON that orjson can't store: the integer is wider than 64 bits
+WIDE_INT = 123456789012345678901234567890
+
+@pytest.mark.anyio
+async def test_stash_rejects_wide_integers(client: AsyncClient, free_user_headers):
+    """Verify that data with integers wider than 64 bits gets a 422, not a 500."""
+    response = await client.post(
+        "/stash",
+        headers={**free_user_headers, **JSON_CONTENT},
+        content=b'{"data": %d, "ttl": 60}' % WIDE_INT,
+    )
+
+    assert response.status_code == 422
+    assert "64-bit" in response.json()["detail"]
+
+@pytest.mark.anyio
+async def test_update_rejects_wide_integers(client, stash_factory, free_user_headers):
+    """Verify that replacing data with a too-wide integer gets a 422 and keeps the old data."""
+    memory_id = await stash_factory(free_user_headers, {"version": 1})
+
+    response = await client.patch(
+        f"/update/{memory_id}",
+        headers={**free_user_headers, **JSON_CONTENT},
+        content=b'{"data": %d}' % WIDE_INT,
+    )
+
+    assert response.status_code == 422
+    assert "64-bit" in response.json()["detail"]
+
+    response = await client.get(f"/recall/{memory_id}", headers=free_user_headers)
+    assert response.json()["data"] == {"version": 1}
@@ -35,16 +35,33 @@ async def test_duplicate_user_creation(client):
     assert result is None
 
 
+@pytest.mark.anyio
+async def test_bulk_create_users(client):
+    """Verify bulk creation returns keys in order, with None for existing users."""
+    keys = await user_db.bulk_create_users([
+        ("test_bulk_a", "free"),
+        ("test_free", "free"),
+        ("test_bulk_b", "pro"),
+    ])
+
+    assert keys[0] is not None
+    assert keys[1] is None
+    assert keys[2] is not None
+
+    user = await user_db.get_user_by_api_key(keys[2])
+    assert user == {"id": "test_bulk_b", "tier": "pro"}
+    assert await user_db.get_user_by_key_hash(user_db.hash_key(keys[2])) == user
+
+
 @pytest.mark.anyio
 async def test_regenerate_api_key(client):
     """Verify regenerating an API key returns a new key that works."""
-    from app.main import app
-
-    # Get the old key
-    old_key = app.state.test_free_key
+    # Use a throwaway user so the shared test users keep their keys;
+    # the test_ prefix means the client fixture cleans it up
+    old_key = await user_db.create_user("test_regen", "free")
 
     # Regenerate
-    new_key = await user_db.regenerate_api_key("test_free")
+    new_key = await user_db.regenerate_api_key("test_regen")
 
     assert new_key is not None
     assert new_key != old_key
@@ -53,17 +70,12 @@ async def test_regenerate_api_key(client):
     # New key should work for auth
     user = await user_db.get_user_by_api_key(new_key)
     assert user is not None
-    assert user["id"] == "test_free"
+    assert user["id"] == "test_regen"
 
     # Old key should no longer work
     old_user = await user_db.get_user_by_api_key(old_key)
     assert old_user is None
 
-    # Restore the old key so other tests aren't affected
-    # (regenerate again and update app state)
-    restored_key = await user_db.regenerate_api_key("test_free")
-    app.state.test_free_key = restored_key
-
 
 @pytest.mark.anyio
 async def test_regenerate_api_key_nonexistent(client):
@@ -71,3 +83,66 @@ async def test_regenerate_api_key_nonexistent(client):
     result = await user_db.regenerate_api_key("user_does_not_exist")
 
     assert result is None
+
+
+@pytest.mark.anyio
+async def test_seed_demo_users_is_idempotent(client):
+    """Verify seeding creates demo users once and is a no-op afterwards."""
+    demo_ids = ["user_free_001", "user_pro_001", "user_ent_001"]
+    async with user_db._pool.acquire() as conn:
+        await conn.execute("DELETE FROM users WHERE id = ANY($1::text[])", demo_ids)
+
+    try:
+        first = await user_db.seed_demo_users()
+        second = await user_db.seed_demo_users()
+
+        assert set(first) == {"free", "pro", "enterprise"}
+        assert second == {}
+    finally:
+        async with user_db._pool.acquire() as conn:
+            await conn.execute("DELETE FROM users WHERE id = ANY($1::text[])", demo_ids)
+
+
+@pytest.mark.anyio
+async def test_migrate_replaces_plain_index(client):
+    """Verify migrate builds the covering index, drops the old one and can rerun."""
+    from app.migrate import migrate
+
+    async with user_db._pool.acquire() as conn:
+        await conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_users_api_key_hash ON users(api_key_hash)"
+        )
+
+    await migrate(user_db._settings.database_url)
+    await migrate(user_db._settings.database_url)
+
+    async with user_db._pool.acquire() as conn:
+        cover_valid = await conn.fetchval(
+            "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass('idx_users_api_key_hash_cover')"
+        )
+        old_index = await conn.fetchval("SELECT to_regclass('idx_users_api_key_hash')")
+
+    assert cover_valid is True
+    assert old_index is None
+
+
+@pytest.mark.anyio
+async def test_migrate_concurrent_runs(client):
+    """Verify two migrations started together both succeed, one after the other."""
+    import asyncio
+    from app.migrate import migrate
+
+    async with user_db._pool.acquire() as conn:
+        await conn.execute("DROP INDEX IF EXISTS idx_users_api_key_hash_cover")
+
+    await asyncio.gather(
+        migrate(user_db._settings.database_url),
+        migrate(user_db._settings.database_url),
+    )
+
+    async with user_db._pool.acquire() as conn:
+        cover_valid = await conn.fetchval(
+            "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass('idx_users_api_key_hash_cover')"
+        )
+
+    assert cover_valid is True